@@ -1,14 +1,14 @@
 """clangd implementation"""
 
 import logging
+import os
 import threading
 
-from collections import namedtuple
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from dataclasses import dataclass
-from functools import wraps
-from html import escape as escape_html
-from pathlib import Path
-from typing import Optional, Dict, List, Callable
+from hashlib import blake2b
+from typing import Optional, Dict, List, Iterable, Tuple, Union
 
 import sublime
 
@@ -20,7 +20,7 @@ from .constant import (
 from .session import (
     Session,
     DiagnosticPanel,
-    COMPLETION_KIND_MAP,
+    COMPLETION_KIND_TABLE,
     input_text,
     open_location,
 )
@@ -41,46 +41,35 @@ from .workspace import (
 PathStr = str
 PathEncodedStr = str
 """Path encoded '<file_name>:<row>:<column>'"""
-LineCharacter = namedtuple("LineCharacter", ["line", "character"])
 LOGGER = logging.getLogger(LOGGING_CHANNEL)
+snippet_completion = sublime.CompletionItem.snippet_completion
+HTML_ESCAPE_TABLE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
 
 
 class InitializeManager:
     def __init__(self):
+        self.begun = False
         self.event = threading.Event()
 
     def is_begin(self):
-        return self.event.is_set()
+        return self.begun
 
     def begin(self):
         """begin session"""
+        self.begun = True
         self.event.set()
 
     def done(self):
         """done session"""
+        self.begun = False
         self.event.clear()
 
-    def must_begin(self, func):
-        """return 'None' if not begin"""
-
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            if not self.event.is_set():
-                return None
-
-            return func(*args, **kwargs)
-
-        return wrapper
-
-    def wait_begin(self, func):
-        """return function after session is begin"""
-
-        @wraps(func)
-        def wrapper(*args, **kwargs):
+    def wait(self):
+        """wait until session is begin"""
+        if not self.begun:
             self.event.wait()
-            return func(*args, **kwargs)
-
-        return wrapper
 
 
 class ClangdSession(Session):
@@ -97,18 +86,35 @@ class ClangdSession(Session):
 
         # workspace status
         self._initializing = False
-        self.hover_location = (0, 0)
+        # hover popup (message, row, col) by (uri, row, col, version)
+        self._hover_cache: Dict[tuple, Tuple[str, int, int]] = OrderedDict()
+        self._hover_cache_lock = threading.Lock()
+        # (document, cache key) by hover request id, guarded by cache lock
+        self._hover_requests: Dict[int, Tuple[BufferedDocument, tuple]] = {}
+        self._code_action_url = ((0, -1), "")
 
         # document target
         self.action_target_map: Dict[MethodName, BufferedDocument] = {}
         self.workspace = Workspace()
 
+        # pending 'textDocument/didChange' (document, content changes, version),
+        # flushed as single notification per document
+        self._pending_changes: Dict[
+            PathStr, Tuple[BufferedDocument, List[dict], int]
+        ] = {}
+        self._pending_changes_lock = threading.Lock()
+        self._changes_generation = 0
+        # hash of text sent in 'textDocument/didOpen'
+        self._opened_text_hash: Dict[PathStr, bytes] = {}
+
     def _set_default_handler(self):
         handlers = {
             "initialize": self.handle_initialize,
             # window
             "window/logMessage": self.handle_window_logmessage,
             "window/showMessage": self.handle_window_showmessage,
+            "window/workDoneProgress/create": self.handle_ignored,
+            "$/progress": self.handle_ignored,
             # workspace
             "workspace/applyEdit": self.handle_workspace_applyedit,
             "workspace/executeCommand": self.handle_workspace_executecommand,
@@ -128,8 +134,14 @@ class ClangdSession(Session):
     def _reset_state(self) -> None:
         self._initializing = False
         self.workspace = Workspace()
+        with self._pending_changes_lock:
+            self._pending_changes.clear()
+        self._opened_text_hash.clear()
 
         self.action_target_map.clear()
+        with self._hover_cache_lock:
+            self._hover_cache.clear()
+            self._hover_requests.clear()
         self.initialize_manager.done()
 
     def _is_ready(self) -> bool:
@@ -187,14 +199,19 @@ class ClangdSession(Session):
         self.diagnostic_manager.reset()
         self.initialize_manager.begin()
 
+    def handle_ignored(self, params: dict):
+        """ignore frequent messages we don't handle"""
+        return None
+
     def handle_window_logmessage(self, params: dict):
         print(params["message"])
 
     def handle_window_showmessage(self, params: dict):
         sublime.status_message(params["message"])
 
-    @initialize_manager.wait_begin
     def textdocument_didopen(self, view: sublime.View, *, reload: bool = False):
+        self.initialize_manager.wait()
+
         # check if view not closed
         if not (view and view.is_valid()):
             return
@@ -203,8 +220,12 @@ class ClangdSession(Session):
         self.diagnostic_manager.set_active_view(view)
 
         if opened_document := self.workspace.get_document(view):
-            if opened_document.file_name == file_name and (not reload):
-                return
+            if opened_document.file_name == file_name:
+                if not reload:
+                    return
+                opened_hash = self._opened_text_hash.get(file_name)
+                if opened_hash and opened_hash == text_hash(opened_document.text):
+                    return
 
             # In SublimeText, rename file only retarget to new path
             # but the 'View' is not closed.
@@ -212,37 +233,44 @@ class ClangdSession(Session):
             self.textdocument_didclose(view)
 
         document = BufferedDocument(view)
-        self.workspace.add_document(document)
 
         # Document maybe opened in multiple 'View', send notification
         # only on first opening document.
-        if len(self.workspace.get_documents(file_name)) == 1:
+        if self.workspace.add_document(document) == 1:
+            text = document.text
+            self._opened_text_hash[file_name] = text_hash(text)
             self.client.send_notification(
                 "textDocument/didOpen",
                 {
                     "textDocument": {
                         "languageId": document.language_id,
-                        "text": document.text,
-                        "uri": path_to_uri(document.file_name),
+                        "text": text,
+                        "uri": document.uri,
                         "version": document.version,
                     }
                 },
             )
 
-    @initialize_manager.must_begin
     def textdocument_didsave(self, view: sublime.View):
+        if not self.initialize_manager.begun:
+            return
+
+        self._flush_changes()
         if document := self.workspace.get_document(view):
             self.client.send_notification(
                 "textDocument/didSave",
-                {"textDocument": {"uri": path_to_uri(document.file_name)}},
+                {"textDocument": document.identifier},
             )
 
         else:
             # untitled document not yet loaded to server
             self.textdocument_didopen(view)
 
-    @initialize_manager.must_begin
     def textdocument_didclose(self, view: sublime.View):
+        if not self.initialize_manager.begun:
+            return
+
+        self._flush_changes()
         file_name = view.file_name()
         self.diagnostic_manager.remove(view)
         if document := self.workspace.get_document(view):
@@ -252,51 +280,118 @@ class ClangdSession(Session):
             if self.workspace.get_documents(file_name):
                 return
 
+            self._opened_text_hash.pop(document.file_name, None)
             self.client.send_notification(
                 "textDocument/didClose",
-                {"textDocument": {"uri": path_to_uri(document.file_name)}},
+                {"textDocument": document.identifier},
             )
 
-    @initialize_manager.must_begin
-    def textdocument_didchange(self, view: sublime.View, changes: List[TextChange]):
+    CHANGES_FLUSH_DELAY = 30
+    """delay in milliseconds after last change before changes flushed"""
+
+    def textdocument_didchange(self, view: sublime.View, changes: Iterable[TextChange]):
+        if not self.initialize_manager.begun:
+            return
+
         # Document can be related to multiple View but has same file_name.
         # Use get_document_by_name() because may be document already open
         # in other view and the argument view not assigned.
         file_name = view.file_name()
         if document := self.workspace.get_document_by_name(file_name):
-            self.client.send_notification(
-                "textDocument/didChange",
-                {
-                    "contentChanges": [textchange_to_rpc(c) for c in changes],
-                    "textDocument": {
-                        "uri": path_to_uri(document.file_name),
-                        "version": document.version,
-                    },
-                },
+            self._opened_text_hash.pop(file_name, None)
+
+            content_changes = []
+            append = content_changes.append
+            for change in changes:
+                start_row, start_column = change.start
+                end_row, end_column = change.end
+                append(
+                    {
+                        "range": {
+                            "end": {"character": end_column, "line": end_row},
+                            "start": {"character": start_column, "line": start_row},
+                        },
+                        "rangeLength": change.length,
+                        "text": change.text,
+                    }
+                )
+
+            version = document.version
+            with self._pending_changes_lock:
+                if pending := self._pending_changes.get(file_name):
+                    content_changes = pending[1] + content_changes
+
+                self._pending_changes[file_name] = (
+                    document,
+                    content_changes,
+                    version,
+                )
+
+                self._changes_generation += 1
+                generation = self._changes_generation
+
+            sublime.set_timeout_async(
+                lambda: self._flush_quiet_changes(generation), self.CHANGES_FLUSH_DELAY
             )
 
-    def _get_diagnostic_message(self, view: sublime.View, row: int, col: int):
-        point = view.text_point(row, col)
+    def _flush_quiet_changes(self, generation: int):
+        """flush changes if no change after this generation"""
+        if generation == self._changes_generation:
+            self._flush_changes()
 
-        def contain_point(item: DiagnosticItem):
-            return item.region.contains(point)
+    def _flush_changes(self):
+        """send pending changes
 
-        diagnostics = self.diagnostic_manager.get_active_view_diagnostics(contain_point)
+        Must be called before any other message related to document
+        to keep messages order.
+        """
+        with self._pending_changes_lock:
+            if not self._pending_changes:
+                return
+
+            for document, content_changes, version in self._pending_changes.values():
+                self.client.send_notification(
+                    "textDocument/didChange",
+                    {
+                        "contentChanges": content_changes,
+                        "textDocument": {
+                            "uri": document.uri,
+                            "version": version,
+                        },
+                    },
+                )
+            self._pending_changes.clear()
+
+    def _get_diagnostic_message(self, view: sublime.View, row: int, col: int):
+        point = view.text_point_utf8(row, col)
+
+        diagnostics = self.diagnostic_manager.get_active_view_diagnostics_at(point)
         if not diagnostics:
             return ""
 
-        title = "### Diagnostics:\n"
-        diagnostic_message = "\n".join(
-            [f"- {escape_html(d.message)}" for d in diagnostics]
-        )
-        command_url = sublime.command_url(
-            f"{COMMAND_PREFIX}_code_action", {"event": {"text_point": point}}
-        )
-        footer = f'***\n<a href="{command_url}">Code Action</a>'
-        return f"{title}\n{diagnostic_message}\n{footer}"
+        message = ["### Diagnostics:\n"]
+        append = message.append
+        for diagnostic in diagnostics:
+            append(f"\n- {diagnostic.message.translate(HTML_ESCAPE_TABLE)}")
+
+        key = (view.id(), point)
+        cached_key, command_url = self._code_action_url
+        if key != cached_key:
+            command_url = sublime.command_url(
+                f"{COMMAND_PREFIX}_code_action", {"event": {"text_point": point}}
+            )
+            self._code_action_url = (key, command_url)
+
+        append(f'\n***\n<a href="{command_url}">Code Action</a>')
+        return "".join(message)
+
+    HOVER_CACHE_SIZE = 128
 
-    @initialize_manager.must_begin
     def textdocument_hover(self, view, row, col):
+        if not self.initialize_manager.begun:
+            return
+
+        self._flush_changes()
         method = "textDocument/hover"
         # In multi row/column layout, new popup will created in current View,
         # but active popup doesn't discarded.
@@ -308,18 +403,30 @@ class ClangdSession(Session):
                 document.show_popup(message, row, col)
                 return
 
+            key = (document.uri, row, col, document.version)
+            with self._hover_cache_lock:
+                if cached := self._hover_cache.get(key):
+                    self._hover_cache.move_to_end(key)
+            if cached:
+                document.show_popup(*cached)
+                return
+
             self.action_target_map[method] = document
-            self.hover_location = (row, col)
-            self.client.send_request(
-                method,
-                {
-                    "position": {"character": col, "line": row},
-                    "textDocument": {"uri": path_to_uri(document.file_name)},
-                },
-            )
+            params = text_document_position(document, row, col)
+            # Hover sent from multiple worker threads, hold the lock until
+            # request id stored so response handler always find it.
+            with self._hover_cache_lock:
+                request_id = self.client.send_request(method, params)
+                self._hover_requests.clear()
+                self._hover_requests[request_id] = (document, key)
 
     def handle_textdocument_hover(self, params: Response):
-        method = "textDocument/hover"
+        with self._hover_cache_lock:
+            request = self._hover_requests.pop(params.id, None)
+        if not request:
+            return
+
+        document, key = request
         if err := params.error:
             print(err["message"])
 
@@ -329,51 +436,31 @@ class ClangdSession(Session):
                 start = result["range"]["start"]
                 row, col = start["line"], start["character"]
             except KeyError:
-                row, col = self.hover_location
+                row, col = key[1], key[2]
 
-            self.action_target_map[method].show_popup(message, row, col)
+            with self._hover_cache_lock:
+                self._hover_cache[key] = (message, row, col)
+                if len(self._hover_cache) > self.HOVER_CACHE_SIZE:
+                    self._hover_cache.popitem(last=False)
+
+            document.show_popup(message, row, col)
 
-    @initialize_manager.must_begin
     def textdocument_completion(self, view, row, col):
+        if not self.initialize_manager.begun:
+            return
+
         method = "textDocument/completion"
         if document := self.workspace.get_document(view):
             self.action_target_map[method] = document
-            self.client.send_request(
-                method,
-                {
-                    "position": {"character": col, "line": row},
-                    "textDocument": {"uri": path_to_uri(document.file_name)},
-                },
-            )
+            params = text_document_position(document, row, col)
 
-    @staticmethod
-    def _build_completion(completion_item: dict) -> sublime.CompletionItem:
+            def send_request():
+                self._flush_changes()
+                self.client.send_request(method, params)
 
-        text = completion_item["filterText"]
-        try:
-            insert_text = completion_item["textEdit"]["newText"]
-        except KeyError:
-            insert_text = text
-
-        # clangd defined 'label' starts with '<space>' or '�'
-        signature = completion_item["label"][1:]
-
-        # sublime text has complete the header bracket '<> or ""'
-        # remove it from clangd result
-        if completion_item["kind"] in (17, 19):
-            closing_include = '">'
-            text = text.rstrip(closing_include)
-            insert_text = insert_text.rstrip(closing_include)
-            signature = signature.rstrip(closing_include)
-
-        kind = COMPLETION_KIND_MAP[completion_item["kind"]]
-
-        return sublime.CompletionItem.snippet_completion(
-            trigger=text,
-            snippet=insert_text,
-            annotation=signature,
-            kind=kind,
-        )
+            # Called by 'on_query_completions()' in UI thread, send request in
+            # async thread. Pending changes flushed there to keep messages order.
+            sublime.set_timeout_async(send_request)
 
     def handle_textdocument_completion(self, params: Response):
         method = "textDocument/completion"
@@ -381,18 +468,23 @@ class ClangdSession(Session):
             print(err["message"])
 
         elif result := params.result:
-            items = [self._build_completion(item) for item in result["items"]]
+            items = list(map(build_completion, result["items"]))
             self.action_target_map[method].show_completion(items)
 
     def handle_textdocument_publishdiagnostics(self, params: dict):
         file_name = uri_to_path(params["uri"])
-        diagnostics = params["diagnostics"]
+        if not (documents := self.workspace.get_documents(file_name)):
+            return
 
-        for document in self.workspace.get_documents(file_name):
+        diagnostics = params["diagnostics"]
+        for document in documents:
             self.diagnostic_manager.set(document.view, diagnostics)
 
-    @initialize_manager.must_begin
     def textdocument_formatting(self, view):
+        if not self.initialize_manager.begun:
+            return
+
+        self._flush_changes()
         method = "textDocument/formatting"
         if document := self.workspace.get_document(view):
             self.action_target_map[method] = document
@@ -400,7 +492,7 @@ class ClangdSession(Session):
                 method,
                 {
                     "options": {"insertSpaces": True, "tabSize": 2},
-                    "textDocument": {"uri": path_to_uri(document.file_name)},
+                    "textDocument": document.identifier,
                 },
             )
 
@@ -414,7 +506,7 @@ class ClangdSession(Session):
 
     def handle_workspace_applyedit(self, params: dict) -> dict:
         try:
-            WorkspaceEdit(self.workspace).apply_changes(params["edit"])
+            apply_workspace_edit(self.workspace, params["edit"])
 
         except Exception as err:
             LOGGER.error(err, exc_info=True)
@@ -430,18 +522,15 @@ class ClangdSession(Session):
 
         return None
 
-    @initialize_manager.must_begin
     def textdocument_declaration(self, view, row, col):
+        if not self.initialize_manager.begun:
+            return
+
+        self._flush_changes()
         method = "textDocument/declaration"
         if document := self.workspace.get_document(view):
             self.action_target_map[method] = document
-            self.client.send_request(
-                method,
-                {
-                    "position": {"character": col, "line": row},
-                    "textDocument": {"uri": path_to_uri(document.file_name)},
-                },
-            )
+            self.client.send_request(method, text_document_position(document, row, col))
 
     def handle_textdocument_declaration(self, params: Response):
         method = "textDocument/declaration"
@@ -449,28 +538,18 @@ class ClangdSession(Session):
             print(error["message"])
         elif result := params.result:
             view = self.action_target_map[method].view
-            locations = [self._build_location(l) for l in result]
+            locations = list(map(build_location, result))
             open_location(view, locations)
 
-    @initialize_manager.must_begin
     def textdocument_definition(self, view, row, col):
+        if not self.initialize_manager.begun:
+            return
+
+        self._flush_changes()
         method = "textDocument/definition"
         if document := self.workspace.get_document(view):
             self.action_target_map[method] = document
-            self.client.send_request(
-                method,
-                {
-                    "position": {"character": col, "line": row},
-                    "textDocument": {"uri": path_to_uri(document.file_name)},
-                },
-            )
-
-    @staticmethod
-    def _build_location(location: dict) -> PathEncodedStr:
-        file_name = uri_to_path(location["uri"])
-        row = location["range"]["start"]["line"]
-        col = location["range"]["start"]["character"]
-        return f"{file_name}:{row+1}:{col+1}"
+            self.client.send_request(method, text_document_position(document, row, col))
 
     def handle_textdocument_definition(self, params: Response):
         method = "textDocument/definition"
@@ -478,34 +557,30 @@ class ClangdSession(Session):
             print(error["message"])
         elif result := params.result:
             view = self.action_target_map[method].view
-            locations = [self._build_location(l) for l in result]
+            locations = list(map(build_location, result))
             open_location(view, locations)
 
-    @initialize_manager.must_begin
     def textdocument_preparerename(self, view, row, col):
+        if not self.initialize_manager.begun:
+            return
+
+        self._flush_changes()
         method = "textDocument/prepareRename"
         if document := self.workspace.get_document(view):
             self.action_target_map[method] = document
-            self.client.send_request(
-                method,
-                {
-                    "position": {"character": col, "line": row},
-                    "textDocument": {"uri": path_to_uri(document.file_name)},
-                },
-            )
+            self.client.send_request(method, text_document_position(document, row, col))
 
-    @initialize_manager.must_begin
     def textdocument_rename(self, view, row, col, new_name):
+        if not self.initialize_manager.begun:
+            return
+
+        self._flush_changes()
         method = "textDocument/rename"
         if document := self.workspace.get_document(view):
             self.action_target_map[method] = document
             self.client.send_request(
                 method,
-                {
-                    "newName": new_name,
-                    "position": {"character": col, "line": row},
-                    "textDocument": {"uri": path_to_uri(document.file_name)},
-                },
+                {"newName": new_name, **text_document_position(document, row, col)},
             )
 
     def _handle_preparerename(self, location: dict):
@@ -513,13 +588,13 @@ class ClangdSession(Session):
         view = self.action_target_map[method].view
 
         start = location["start"]
-        start_point = view.text_point(start["line"], start["character"])
+        start_point = view.text_point_utf8(start["line"], start["character"])
         end = location["end"]
-        end_point = view.text_point(end["line"], end["character"])
+        end_point = view.text_point_utf8(end["line"], end["character"])
 
         region = sublime.Region(start_point, end_point)
         old_name = view.substr(region)
-        row, col = view.rowcol(start_point)
+        row, col = view.rowcol_utf8(start_point)
 
         def request_rename(new_name):
             if new_name and old_name != new_name:
@@ -540,10 +615,13 @@ class ClangdSession(Session):
         if error := params.error:
             print(error["message"])
         elif result := params.result:
-            WorkspaceEdit(self.workspace).apply_changes(result)
+            apply_workspace_edit(self.workspace, result)
 
-    @initialize_manager.must_begin
     def textdocument_code_action(self, view, start, end):
+        if not self.initialize_manager.begun:
+            return
+
+        self._flush_changes()
         method = "textDocument/codeAction"
         if document := self.workspace.get_document(view):
             self.action_target_map[method] = document
@@ -558,7 +636,7 @@ class ClangdSession(Session):
                         "end": {"character": end[1], "line": end[0]},
                         "start": {"character": start[1], "line": start[0]},
                     },
-                    "textDocument": {"uri": path_to_uri(document.file_name)},
+                    "textDocument": document.identifier,
                 },
             )
 
@@ -578,37 +656,89 @@ class ClangdSession(Session):
                 return
 
             edit = actions[index]["edit"]
-            WorkspaceEdit(self.workspace).apply_changes(edit)
-
-        def get_title(action: dict) -> str:
-            title = action["title"]
-            if kind := action.get("kind"):
-                return f"({kind}){title}"
-            return title
+            apply_workspace_edit(self.workspace, edit)
 
-        items = [get_title(a) for a in actions]
-        sublime.active_window().show_quick_panel(items, on_select=on_select)
+        items = [
+            (
+                f"({kind}){action['title']}"
+                if (kind := action.get("kind"))
+                else action["title"]
+            )
+            for action in actions
+        ]
+        window = sublime.active_window()
+        window.show_quick_panel(items, on_select=on_select)
 
 
-def textchange_to_rpc(text_change: TextChange) -> dict:
-    """"""
-    start = text_change.start
-    end = text_change.end
+def text_document_position(document: BufferedDocument, row: int, col: int) -> dict:
+    """rpc 'TextDocumentPositionParams'"""
     return {
-        "range": {
-            "end": {"character": end.column, "line": end.row},
-            "start": {"character": start.column, "line": start.row},
-        },
-        "rangeLength": text_change.length,
-        "text": text_change.text,
+        "position": {"character": col, "line": row},
+        "textDocument": document.identifier,
     }
 
 
+def text_hash(text: str) -> bytes:
+    """short digest to compare document text"""
+    return blake2b(text.encode(), digest_size=8).digest()
+
+
+# completion kind 'file' and 'folder' in '#include'
+INCLUDE_COMPLETION_KINDS = frozenset((17, 19))
+INCLUDE_CLOSING_CHARS = '">'
+LABEL_INDICATORS = " \u2022"
+
+
+def build_completion(completion_item: dict) -> sublime.CompletionItem:
+    """build sublime completion item from rpc completion item"""
+
+    text = completion_item["filterText"]
+    if text_edit := completion_item.get("textEdit"):
+        insert_text = text_edit["newText"]
+    else:
+        insert_text = text
+
+    # clangd defined 'label' starts with '<space>' or '\u2022',
+    # not prefixed if clangd run with '--header-insertion-decorators=0'
+    label = completion_item["label"]
+    signature = label[1:] if label and label[0] in LABEL_INDICATORS else label
+
+    # sublime text has complete the header bracket '<> or ""'
+    # remove it from clangd result
+    kind_id = completion_item["kind"]
+    if kind_id in INCLUDE_COMPLETION_KINDS:
+        text = text.rstrip(INCLUDE_CLOSING_CHARS)
+        insert_text = insert_text.rstrip(INCLUDE_CLOSING_CHARS)
+        signature = signature.rstrip(INCLUDE_CLOSING_CHARS)
+
+    if 0 <= kind_id < len(COMPLETION_KIND_TABLE):
+        kind = COMPLETION_KIND_TABLE[kind_id]
+    else:
+        kind = sublime.KIND_AMBIGUOUS
+
+    return snippet_completion(
+        trigger=text,
+        snippet=insert_text,
+        annotation=signature,
+        kind=kind,
+    )
+
+
+def build_location(location: dict) -> PathEncodedStr:
+    """build path encoded location from rpc location"""
+    file_name = uri_to_path(location["uri"])
+    row = location["range"]["start"]["line"]
+    col = location["range"]["start"]["character"]
+    return f"{file_name}:{row+1}:{col+1}"
+
+
 def rpc_to_textchange(change: dict) -> TextChange:
     """"""
+    start = change["range"]["start"]
+    end = change["range"]["end"]
     return TextChange(
-        LineCharacter(**change["range"]["start"]),
-        LineCharacter(**change["range"]["end"]),
+        (start["line"], start["character"]),
+        (end["line"], end["character"]),
         change["newText"],
         change.get("rangeLength", -1),
     )
@@ -643,7 +773,14 @@ class DiagnosticManager:
 
         self._change_lock = threading.Lock()
         self._active_view: sublime.View = None
-        self._active_view_diagnostics: List[DiagnosticItem] = []
+        # (sorted region begins, items sorted by begin, longest region size)
+        self._active_view_index = self._build_index([])
+        self._panel_contents: Dict[sublime.View, str] = {}
+        self._change_counts: Dict[sublime.View, int] = {}
+        # (rpc diagnostics, view change count, built items)
+        self._items_cache: Dict[
+            sublime.View, Tuple[List[dict], int, List[DiagnosticItem]]
+        ] = {}
 
     def reset(self):
         # erase regions
@@ -651,25 +788,40 @@ class DiagnosticManager:
             view.erase_regions(self.REGIONS_KEY)
 
         self._active_view = None
-        self._active_view_diagnostics = []
+        self._active_view_index = self._build_index([])
+        self._panel_contents = {}
+        self._change_counts = {}
+        self._items_cache = {}
         self.panel.destroy()
         self.diagnostics = {}
 
     def get(self, view: sublime.View) -> List[dict]:
-        with self._change_lock:
-            return self.diagnostics.get(view, [])
+        # 'diagnostics' replaced on change, no need to lock
+        return self.diagnostics.get(view, [])
 
     def set(self, view: sublime.View, diagostics: List[dict]):
         with self._change_lock:
-            self.diagnostics.update({view: diagostics})
+            change_count = view.change_count()
+            if (
+                self._change_counts.get(view) == change_count
+                and self.diagnostics.get(view) == diagostics
+            ):
+                return
+
+            # copy on write, readers never see dict changed while iterating
+            self.diagnostics = {**self.diagnostics, view: diagostics}
+            self._change_counts[view] = change_count
+            self._panel_contents.pop(view, None)
             self._on_diagnostic_changed(view)
 
     def remove(self, view: sublime.View):
         with self._change_lock:
-            try:
-                del self.diagnostics[view]
-            except KeyError:
-                pass
+            self.diagnostics = {
+                key: value for key, value in self.diagnostics.items() if key != view
+            }
+            self._change_counts.pop(view, None)
+            self._items_cache.pop(view, None)
+            self._panel_contents.pop(view, None)
             self._on_diagnostic_changed(view)
 
     def set_active_view(self, view: sublime.View):
@@ -679,18 +831,36 @@ class DiagnosticManager:
         self._active_view = view
         self._on_diagnostic_changed(view)
 
-    def get_active_view_diagnostics(
-        self, filter_func: Callable[[DiagnosticItem], bool] = None
-    ) -> List[DiagnosticItem]:
-        if not filter_func:
-            return self._active_view_diagnostics
-        return [d for d in self._active_view_diagnostics if filter_func(d)]
+    def get_active_view_diagnostics_at(self, point: int) -> List[DiagnosticItem]:
+        """get active view diagnostics which region contain point"""
+
+        begins, items, max_size = self._active_view_index
+        # only regions begin in [point - max_size, point] may contain point
+        lower = bisect_left(begins, point - max_size)
+        upper = bisect_right(begins, point)
+        return [item for item in items[lower:upper] if item.region.contains(point)]
+
+    @staticmethod
+    def _build_index(
+        diagnostics: List[DiagnosticItem],
+    ) -> Tuple[List[int], List[DiagnosticItem], int]:
+        items = sorted(diagnostics, key=lambda item: item.region.begin())
+        begins = [item.region.begin() for item in items]
+        max_size = max((item.region.size() for item in items), default=0)
+        return (begins, items, max_size)
 
     def _on_diagnostic_changed(self, view: sublime.View):
-        diagnostics = [
-            self._to_diagnostic_item(view, diagnostic)
-            for diagnostic in self.diagnostics.get(view, [])
-        ]
+        rpc_diagnostics = self.diagnostics.get(view, [])
+        change_count = view.change_count()
+        cached = self._items_cache.get(view)
+        if cached and cached[0] is rpc_diagnostics and cached[1] == change_count:
+            diagnostics = cached[2]
+        else:
+            diagnostics = self._to_diagnostic_items(view, rpc_diagnostics)
+            # panel content built from previous items
+            self._panel_contents.pop(view, None)
+            if rpc_diagnostics:
+                self._items_cache[view] = (rpc_diagnostics, change_count, diagnostics)
 
         if self.settings.highlight_text:
             self._highlight_regions(view, diagnostics)
@@ -700,27 +870,51 @@ class DiagnosticManager:
         if view != self._active_view:
             return
 
-        self._active_view_diagnostics = diagnostics
+        self._active_view_index = self._build_index(diagnostics)
         if self.settings.show_panel:
             self._show_panel(view, diagnostics)
 
-    def _to_diagnostic_item(
-        self, view: sublime.View, diagnostic: dict, /
-    ) -> DiagnosticItem:
-
-        start = LineCharacter(**diagnostic["range"]["start"])
-        end = LineCharacter(**diagnostic["range"]["end"])
-        region = sublime.Region(view.text_point(*start), view.text_point(*end))
-        message = diagnostic["message"]
-        if source := diagnostic.get("source"):
-            message = f"{message} ({source})"
+    @staticmethod
+    def _to_diagnostic_items(
+        view: sublime.View, diagnostics: List[dict], /
+    ) -> List[DiagnosticItem]:
+        # server run with '--offset-encoding=utf-8'
+        text_point = view.text_point_utf8
+        region = sublime.Region
+
+        points: Dict[Tuple[int, int], int] = {}
+
+        items = []
+        append = items.append
+        for diagnostic in diagnostics:
+            start, end = diagnostic["range"]["start"], diagnostic["range"]["end"]
+
+            start = (start["line"], start["character"])
+            if (start_point := points.get(start)) is None:
+                start_point = points[start] = text_point(*start)
+            end = (end["line"], end["character"])
+            if (end_point := points.get(end)) is None:
+                end_point = points[end] = text_point(*end)
+
+            message = diagnostic["message"]
+            if source := diagnostic.get("source"):
+                message = f"{message} ({source})"
+
+            append(
+                DiagnosticItem(
+                    diagnostic["severity"], region(start_point, end_point), message
+                )
+            )
 
-        return DiagnosticItem(diagnostic["severity"], region, message)
+        return items
 
     REGIONS_KEY = f"{PACKAGE_NAME}_DIAGNOSTIC_REGIONS"
 
     def _highlight_regions(self, view: sublime.View, diagnostics: List[DiagnosticItem]):
         regions = [item.region for item in diagnostics]
+        if view.get_regions(self.REGIONS_KEY) == regions:
+            return
+
         view.add_regions(
             key=self.REGIONS_KEY,
             regions=regions,
@@ -735,42 +929,62 @@ class DiagnosticManager:
 
     def _show_status(self, view: sublime.View, diagnostics: List[DiagnosticItem]):
         value = "ERROR %s, WARNING %s"
-        err_count = len([item for item in diagnostics if item.severity == 1])
+        err_count = 0
+        for item in diagnostics:
+            if item.severity == 1:
+                err_count += 1
         warn_count = len(diagnostics) - err_count
-        view.set_status(self.STATUS_KEY, value % (err_count, warn_count))
+
+        status = value % (err_count, warn_count)
+        if view.get_status(self.STATUS_KEY) != status:
+            view.set_status(self.STATUS_KEY, status)
 
     def _show_panel(self, view: sublime.View, diagnostics: List[DiagnosticItem]):
-        def build_line(view: sublime.View, item: DiagnosticItem):
-            short_name = Path(view.file_name()).name
-            row, col = view.rowcol(item.region.begin())
-            return f"{short_name}:{row+1}:{col} {item.message}"
+        if (content := self._panel_contents.get(view)) is None:
+            content = self._build_panel_content(view, diagnostics)
+            self._panel_contents[view] = content
 
-        content = "\n".join([build_line(view, item) for item in diagnostics])
         self.panel.set_content(content)
         self.panel.show()
 
+    @staticmethod
+    def _build_panel_content(
+        view: sublime.View, diagnostics: List[DiagnosticItem]
+    ) -> str:
+        short_name = os.path.basename(view.file_name())
+        rowcol = view.rowcol
+
+        def build_line(item: DiagnosticItem):
+            row, col = rowcol(item.region.begin())
+            return f"{short_name}:{row+1}:{col} {item.message}"
 
-class WorkspaceEdit:
+        return "\n".join([build_line(item) for item in diagnostics])
 
-    def __init__(self, workspace_: Workspace):
-        self.workspace = workspace_
 
-    def apply_changes(self, edit_changes: dict) -> None:
-        """"""
-        # Clangd implementation is a little different from standard
-        for file_uri, changes in edit_changes["changes"].items():
-            self._apply_textedit_changes(uri_to_path(file_uri), changes)
+def apply_workspace_edit(workspace: Workspace, edit_changes: dict) -> None:
+    """apply workspace edit changes to documents in workspace"""
+    opened_documents = {doc.file_name: doc for doc in workspace.get_documents()}
 
-    def _apply_textedit_changes(self, file_name: PathStr, edits: dict):
-        changes = [rpc_to_textchange(c) for c in edits]
+    # Clangd implementation is a little different from standard
+    documents = [
+        _apply_textedit_changes(opened_documents, uri_to_path(file_uri), changes)
+        for file_uri, changes in edit_changes["changes"].items()
+    ]
 
-        document = self.workspace.get_document_by_name(
-            file_name, UnbufferedDocument(file_name)
-        )
-        document.apply_changes(changes)
+    for document in documents:
         document.save()
 
 
+def _apply_textedit_changes(
+    opened_documents: Dict[PathStr, BufferedDocument], file_name: PathStr, edits: dict
+) -> Union[BufferedDocument, UnbufferedDocument]:
+    changes = [rpc_to_textchange(c) for c in edits]
+
+    document = opened_documents.get(file_name) or UnbufferedDocument(file_name)
+    document.apply_changes(changes)
+    return document
+
+
 def get_session() -> Session:
     """"""
 
@@ -26,13 +26,13 @@ Span = Tuple[int, int]
 LOGGER = logging.getLogger(LOGGING_CHANNEL)
 
 
-@lru_cache(128)
+@lru_cache(4096)
 def path_to_uri(path: PathStr) -> DocumentURI:
     """convert path to uri"""
     return Path(path).as_uri()
 
 
-@lru_cache(128)
+@lru_cache(4096)
 def uri_to_path(uri: DocumentURI) -> PathStr:
     """convert uri to path"""
     parsed = urlparse(uri)
@@ -59,8 +59,10 @@ class TextChange:
 
     def __post_init__(self):
         # possibly if user pass 'start' and 'end' as tuple
-        self.start = RowColIndex(*self.start)
-        self.end = RowColIndex(*self.end)
+        if not isinstance(self.start, RowColIndex):
+            self.start = RowColIndex(*self.start)
+        if not isinstance(self.end, RowColIndex):
+            self.end = RowColIndex(*self.end)
 
 
 class _UnbufferedTextChange:
@@ -108,8 +110,13 @@ class UnbufferedDocument:
         return temp
 
     def calculate_offset(self, row: int, column: int) -> int:
-        line_offset = sum([len(l) for l in self.lines()[:row]])
-        return line_offset + column
+        lines = self.lines()
+        line_offset = sum([len(l) for l in lines[:row]])
+        if row >= len(lines):
+            return line_offset
+        # column in utf-8 code units
+        line = lines[row].encode("utf-8")[:column]
+        return line_offset + len(line.decode("utf-8", errors="ignore"))
 
     def to_text_change(self, change: TextChange) -> _UnbufferedTextChange:
         start = self.calculate_offset(*change.start)
@@ -134,6 +141,9 @@ class BufferedDocument:
     def __init__(self, view: sublime.View):
         self.view = view
         self.file_name = self.view.file_name()
+        self.uri = path_to_uri(self.file_name)
+        # rpc 'TextDocumentIdentifier', shared by messages
+        self.identifier = {"uri": self.uri}
         self.language_id = LANGUAGE_ID
 
         self.view.settings().update(self.VIEW_SETTINGS)
@@ -159,7 +169,7 @@ class BufferedDocument:
         self.view.run_command("save")
 
     def show_popup(self, text: str, row: int, col: int):
-        point = self.view.text_point(row, col)
+        point = self.view.text_point_utf8(row, col)
         self.view.run_command(
             "marked_popup", {"location": point, "text": text, "markup": "markdown"}
         )
@@ -3,22 +3,37 @@
 import json
 import logging
 import os
-import re
+import queue
 import threading
 import subprocess
 import shlex
+import sys
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, asdict
-from functools import lru_cache
+from dataclasses import dataclass
 from io import BytesIO
 from pathlib import Path
-from typing import Optional, Union, List, Dict, Set, Any
+from typing import Optional, Union, List, Dict, Set, Tuple, Any, BinaryIO
 
 from . import errors
 from .constant import LOGGING_CHANNEL
 
 LOGGER = logging.getLogger(LOGGING_CHANNEL)
 
+try:
+    # 'orjson' is faster but not shipped with Sublime Text,
+    # use it if user installed it to plugin host
+    import orjson
+
+    json_dumps = orjson.dumps
+    json_loads = orjson.loads
+
+except ImportError:
+
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    json_loads = json.loads
+
 
 class MethodName(str):
     """Method name"""
@@ -56,7 +71,7 @@ class Response(Message):
 def loads(json_str: Union[str, bytes]) -> Message:
     """loads json-rpc message"""
 
-    dct = json.loads(json_str)
+    dct = json_loads(json_str)
     try:
         if (jsonrpc_version := dct.pop("jsonrpc")) and jsonrpc_version != "2.0":
             raise ValueError("invalid jsonrpc version")
@@ -71,24 +86,6 @@ def loads(json_str: Union[str, bytes]) -> Message:
     return Response(**dct)
 
 
-def dumps(message: Message, as_bytes: bool = False) -> Union[str, bytes]:
-    """dumps json-rpc message"""
-
-    dct = asdict(message)
-    dct["jsonrpc"] = "2.0"
-
-    if isinstance(message, Response):
-        if message.error is None:
-            del dct["error"]
-        else:
-            del dct["result"]
-
-    json_str = json.dumps(dct)
-    if as_bytes:
-        return json_str.encode()
-    return json_str
-
-
 class Handler(ABC):
     """Base handler"""
 
@@ -105,20 +102,58 @@ class HeaderError(ValueError):
     """header error"""
 
 
-def wrap_rpc(content: bytes) -> bytes:
-    """wrap content as rpc body"""
-    header = b"Content-Length: %d\r\n" % len(content)
-    separator = b"\r\n"
-    return b"%s%s%s" % (header, separator, content)
+# Most of notification and request is small, cache their header.
+HEADER_CACHE_SIZE = 4096
+HEADER_CACHE = [b"Content-Length: %d\r\n\r\n" % i for i in range(HEADER_CACHE_SIZE)]
+
+
+def get_header(content: bytes) -> bytes:
+    """get rpc header for content, include the separator"""
+    if (length := len(content)) < HEADER_CACHE_SIZE:
+        return HEADER_CACHE[length]
+    return b"Content-Length: %d\r\n\r\n" % length
+
+
+# 'os.writev()' not available on Windows
+WRITEV_SUPPORTED = hasattr(os, "writev")
+# 'os.writev()' fail if buffers count exceed system limit
+IOV_MAX = 1024
+
+
+def writev_all(fd: int, buffers: List[bytes]) -> None:
+    """write all buffers to file descriptor, handle partial write"""
+
+    views = [memoryview(buffer) for buffer in buffers]
+    while views:
+        written = os.writev(fd, views[:IOV_MAX])
+        while views and written >= len(views[0]):
+            written -= len(views[0])
+            views.pop(0)
+        if written:
+            views[0] = views[0][written:]
+
+
+CONTENT_LENGTH_FIELD = b"Content-Length:"
+# prevent reader allocate unbounded buffer for corrupted header
+MAX_CONTENT_LENGTH = 2**31
 
 
-@lru_cache(maxsize=512)
 def get_content_length(header: bytes) -> int:
-    for line in header.splitlines():
-        if match := re.match(rb"Content-Length: (\d+)", line):
-            return int(match.group(1))
+    """get 'Content-Length' value from header"""
 
-    raise HeaderError("unable get 'Content-Length'")
+    if (start := header.find(CONTENT_LENGTH_FIELD)) < 0:
+        raise HeaderError("unable get 'Content-Length'")
+
+    start += len(CONTENT_LENGTH_FIELD)
+    end = header.find(b"\r\n", start)
+    try:
+        length = int(header[start:end] if end >= 0 else header[start:])
+    except ValueError as err:
+        raise HeaderError("invalid 'Content-Length'") from err
+
+    if not 0 <= length <= MAX_CONTENT_LENGTH:
+        raise HeaderError(f"invalid 'Content-Length': {length}")
+    return length
 
 
 class Transport(ABC):
@@ -137,8 +172,8 @@ class Transport(ABC):
         """terminate server"""
 
     @abstractmethod
-    def write(self, data: bytes) -> None:
-        """write data to server"""
+    def write(self, contents: List[bytes]) -> None:
+        """write contents to server, each content framed with header"""
 
     @abstractmethod
     def read(self) -> bytes:
@@ -152,6 +187,11 @@ if os.name == "nt":
 else:
     STARTUPINFO = None
 
+POPEN_PIPE_OPTIONS = {}
+if sys.version_info >= (3, 10) and os.name != "nt":
+    # Enlarge pipe buffer so server not blocked on writing burst of message.
+    POPEN_PIPE_OPTIONS["pipesize"] = 1 << 20
+
 
 class StandardIO(Transport):
     """StandardIO Transport implementation"""
@@ -163,6 +203,10 @@ class StandardIO(Transport):
         self._process: subprocess.Popen = None
         self._run_proces_event = threading.Event()
 
+        # stdout and unprocessed bytes, bound once per reader thread
+        self._reader = threading.local()
+        self._write_lock = threading.Lock()
+
     def is_running(self):
         try:
             return self._process.poll() is None
@@ -179,9 +223,9 @@ class StandardIO(Transport):
             stderr=subprocess.PIPE,
             env=env or None,
             cwd=self.cwd or None,
-            shell=True,
             bufsize=0,
             startupinfo=STARTUPINFO,
+            **POPEN_PIPE_OPTIONS,
         )
 
         # ready to call 'Popen()' object
@@ -215,11 +259,18 @@ class StandardIO(Transport):
         self._run_proces_event.wait()
 
         prefix = f"[{self.command[0]}]"
-        while bline := self.stderr.readline():
-            print(prefix, bline.rstrip().decode())
+        buffer = bytearray()
+        while chunk := self.stderr.read(self.READ_CHUNK_SIZE):
+            buffer.extend(chunk)
+            if (line_end := buffer.rfind(b"\n")) < 0:
+                continue
 
-        # else:
-        return
+            lines = buffer[:line_end].decode(errors="replace").splitlines()
+            del buffer[: line_end + 1]
+            print("\n".join([f"{prefix} {line.rstrip()}" for line in lines]))
+
+        if buffer:
+            print(prefix, buffer.decode(errors="replace").rstrip())
 
     def terminate(self):
         """terminate process"""
@@ -234,47 +285,68 @@ class StandardIO(Transport):
             # set to None to release 'Popen()' object from memory
             self._process = None
 
-    def write(self, data: bytes):
-        self._run_proces_event.wait()
-
-        prepared_data = wrap_rpc(data)
-        self.stdin.write(prepared_data)
-        self.stdin.flush()
+    def write(self, contents: List[bytes]):
+        # process may be terminated by other thread
+        if not (process := self._process) or process.poll() is not None:
+            raise ServerNotRunning("server not running")
 
-    def read(self):
-        self._run_proces_event.wait()
+        frames = []
+        for content in contents:
+            frames += (get_header(content), content)
 
-        # get header
-        header_buffer = BytesIO()
-        header_separator = b"\r\n"
-        while line := self.stdout.readline():
-            # header and content separated by newline with \r\n
-            if line == header_separator:
-                break
-            header_buffer.write(line)
-
-        header = header_buffer.getvalue()
-
-        # no header received
-        if not header:
-            raise EOFError("stdout closed")
+        # prevent message from multiple threads interleaved
+        with self._write_lock:
+            try:
+                if WRITEV_SUPPORTED:
+                    # write header and content without concatenate them
+                    writev_all(process.stdin.fileno(), frames)
+                else:
+                    process.stdin.write(b"".join(frames))
+                    process.stdin.flush()
+            except (OSError, ValueError) as err:
+                raise ServerNotRunning("server not running") from err
 
+    def read(self):
+        reader = self._reader
+        if not hasattr(reader, "stdout"):
+            self._run_proces_event.wait()
+            reader.stdout, reader.buffer = self.stdout, bytearray()
+        stdout, buffer = reader.stdout, reader.buffer
+
+        # header and content separated by empty line with \r\n
+        separator = b"\r\n\r\n"
+        while (header_end := buffer.find(separator)) < 0:
+            self._fill_read_buffer(stdout, buffer)
+
+        header = bytes(buffer[:header_end])
         try:
             defined_length = get_content_length(header)
         except HeaderError as err:
-            LOGGER.exception("header: %s", header_buffer.getvalue())
+            LOGGER.exception("header: %s", header)
             raise err
 
-        content_buffer = BytesIO()
-        received_length = 0
+        content_start = header_end + len(separator)
+        content_end = content_start + defined_length
         # Read until defined content_length received.
-        while (missing := defined_length - received_length) and missing > 0:
-            if chunk := self.stdout.read(missing):
-                received_length += content_buffer.write(chunk)
-            else:
-                raise EOFError("stdout closed")
-
-        return content_buffer.getvalue()
+        while len(buffer) < content_end:
+            self._fill_read_buffer(stdout, buffer)
+
+        # Slicing 'bytearray' create a copy, slice the 'memoryview' instead.
+        # The view must be released before the buffer resized.
+        with memoryview(buffer) as buffer_view:
+            content = bytes(buffer_view[content_start:content_end])
+        del buffer[:content_end]
+        return content
+
+    READ_CHUNK_SIZE = 65536
+
+    def _fill_read_buffer(self, stdout: BinaryIO, buffer: bytearray) -> None:
+        # 'stdout' is unbuffered, 'read()' return any available bytes
+        # up to 'READ_CHUNK_SIZE' without waiting the size fulfilled
+        if chunk := stdout.read(self.READ_CHUNK_SIZE):
+            buffer.extend(chunk)
+        else:
+            raise EOFError("stdout closed")
 
 
 class Canceled(Exception):
@@ -286,6 +358,8 @@ class RequestManager:
 
     def __init__(self):
         self.methods_map: Dict[int, MethodName] = {}
+        # reverse index of 'methods_map'
+        self.method_requests: Dict[MethodName, Set[int]] = {}
         self.canceled_requests: Set[int] = set()
         self.request_count = 0
 
@@ -298,10 +372,14 @@ class RequestManager:
             request_count: int
         """
         with self._lock:
-            self.request_count += 1
-            self.methods_map[self.request_count] = method
+            return self._add(method)
 
-            return self.request_count
+    def _add(self, method: MethodName) -> int:
+        self.request_count += 1
+        self.methods_map[self.request_count] = method
+        self.method_requests.setdefault(method, set()).add(self.request_count)
+
+        return self.request_count
 
     def pop(self, request_id: int) -> MethodName:
         """pop method paired with request_id
@@ -319,12 +397,19 @@ class RequestManager:
                 raise Canceled(request_id)
 
             # pop() is simpler than get() and del
-            return self.methods_map.pop(request_id)
+            method = self.methods_map.pop(request_id)
+            self._remove_method_request(method, request_id)
+            return method
+
+    def _remove_method_request(self, method: MethodName, request_id: int) -> None:
+        request_ids = self.method_requests[method]
+        request_ids.discard(request_id)
+        if not request_ids:
+            del self.method_requests[method]
 
     def _get_previous_request(self, method: MethodName) -> Optional[int]:
-        for req_id, meth in self.methods_map.items():
-            if meth == method:
-                return req_id
+        if request_ids := self.method_requests.get(method):
+            return min(request_ids)
 
         return None
 
@@ -336,52 +421,136 @@ class RequestManager:
         """
 
         with self._lock:
-            request_id = self._get_previous_request(method)
-            if request_id is None:
-                return None
+            return self._cancel(method)
+
+    def _cancel(self, method: MethodName) -> Optional[int]:
+        request_id = self._get_previous_request(method)
+        if request_id is None:
+            return None
+
+        del self.methods_map[request_id]
+        self._remove_method_request(method, request_id)
+        self.canceled_requests.add(request_id)
+        return request_id
+
+    def replace(self, method: MethodName) -> Tuple[int, Optional[int]]:
+        """cancel previous request with same method then add new request
 
-            del self.methods_map[request_id]
-            self.canceled_requests.add(request_id)
-            return request_id
+        Return:
+            (request_id, canceled_request_id): Tuple[int, Optional[int]]
+        """
+
+        with self._lock:
+            canceled_id = self._cancel(method)
+            return self._add(method), canceled_id
 
     def cancel_all(self) -> Optional[int]:
         """cancel all request"""
 
         with self._lock:
             self.methods_map.clear()
+            self.method_requests.clear()
             self.canceled_requests.clear()
 
 
+def is_diagnostics(message: Message) -> bool:
+    """check if message is 'textDocument/publishDiagnostics' notification"""
+    return (
+        isinstance(message, Notification)
+        and message.method == "textDocument/publishDiagnostics"
+    )
+
+
+def coalesce_diagnostics(messages: List[Message]) -> List[Message]:
+    """drop 'textDocument/publishDiagnostics' notification replaced
+    by later notification for the same document"""
+
+    published_uris = set()
+    coalesced = []
+    for message in reversed(messages):
+        if is_diagnostics(message):
+            if (uri := message.params["uri"]) in published_uris:
+                continue
+            published_uris.add(uri)
+
+        coalesced.append(message)
+
+    coalesced.reverse()
+    return coalesced
+
+
 class Client:
     def __init__(self, transport: Transport, handler: Handler):
         self.transport = transport
         self.handler = handler
         self._request_manager = RequestManager()
 
+        self._message_handler_map = {
+            Request: self._handle_request,
+            Response: self._handle_response,
+            Notification: self._handle_notification,
+        }
+
+        # Outgoing payloads written by single writer thread in put order.
+        # Outbox replaced when writer stopped, payloads in older outbox
+        # belong to terminated server.
+        self._outbox = queue.Queue()
+        self._outbox_lock = threading.Lock()
+        # held by writer while writing, outbox not replaced in the middle
+        self._write_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+
     def _reset_state(self) -> None:
-        self._request_manager = RequestManager()
+        # Keep the request counter, response from terminated server
+        # may still in dispatcher and must not match the new request id.
+        self._request_manager.cancel_all()
 
-    def send_message(self, message: Message) -> None:
-        content = dumps(message, as_bytes=True)
-        self.transport.write(content)
+    def _send_payload(self, payload: dict) -> None:
+        with self._outbox_lock:
+            self._outbox.put(payload)
 
-    def _listen_task(self) -> None:
-        def listen_message() -> Message:
-            if not self.transport:
-                raise EOFError("transport is closed")
+    def _write_task(self, outbox: queue.Queue) -> None:
+        """write queued payload to transport"""
 
-            content = self.transport.read()
+        while True:
+            # take all queued payload, write them at once
+            payloads = [outbox.get()]
             try:
-                message = loads(content)
-            except json.JSONDecodeError as err:
-                LOGGER.exception("content: '%s'", content)
-                raise err
-
-            return message
+                while True:
+                    payloads.append(outbox.get_nowait())
+            except queue.Empty:
+                pass
+
+            if any(payload is None for payload in payloads):
+                return
+
+            contents = [json_dumps(payload) for payload in payloads]
+            with self._write_lock:
+                # outbox replaced, payloads belong to terminated server
+                if outbox is not self._outbox:
+                    return
+                try:
+                    self.transport.write(contents)
+                except ServerNotRunning:
+                    pass
+                except Exception as err:
+                    LOGGER.exception(err, exc_info=True)
+
+    def _stop_writer(self) -> None:
+        # transport terminated before, writer holding the lock not blocked
+        with self._write_lock, self._outbox_lock:
+            outbox, self._outbox = self._outbox, queue.Queue()
+        outbox.put(None)
+        self._writer = None
+
+    def _listen_task(self, inbox: queue.Queue) -> None:
+        """read message content from transport and pass it to dispatcher"""
 
         while True:
             try:
-                message = listen_message()
+                if not self.transport:
+                    raise EOFError("transport is closed")
+                content = self.transport.read()
 
             except EOFError:
                 # if stdout closed
@@ -392,14 +561,57 @@ class Client:
                 self.terminate_server()
                 break
 
-            try:
-                self.handle_message(message)
-            except Exception:
-                LOGGER.exception("error handle message: %s", message, exc_info=True)
+            inbox.put(content)
+
+        # stop dispatcher
+        inbox.put(None)
+
+    def _dispatch_task(self, inbox: queue.Queue) -> None:
+        """decode and handle message content in received order"""
+
+        while True:
+            # take all received content to coalesce outdated messages
+            contents = [inbox.get()]
+            while not inbox.empty():
+                contents.append(inbox.get_nowait())
+
+            messages = []
+            for content in contents:
+                # stop dispatcher
+                if content is None:
+                    break
+                try:
+                    messages.append(loads(content))
+                except Exception:
+                    LOGGER.exception("content: '%s'", content)
+                    self.terminate_server()
+                    return
+
+            messages = coalesce_diagnostics(messages)
+            # Rendering diagnostics is slow, handle it after other messages
+            # so responses user waiting for (hover, completion) not delayed.
+            messages.sort(key=is_diagnostics)
+
+            for message in messages:
+                try:
+                    self.handle_message(message)
+                except Exception:
+                    LOGGER.exception("error handle message: %s", message, exc_info=True)
+
+            if content is None:
+                return
 
     def listen(self) -> None:
-        thread = threading.Thread(target=self._listen_task, daemon=True)
-        thread.start()
+        if self._writer:
+            self._stop_writer()
+        self._writer = threading.Thread(
+            target=self._write_task, args=(self._outbox,), daemon=True
+        )
+        self._writer.start()
+
+        inbox = queue.Queue()
+        threading.Thread(target=self._listen_task, args=(inbox,), daemon=True).start()
+        threading.Thread(target=self._dispatch_task, args=(inbox,), daemon=True).start()
 
     def is_server_running(self) -> bool:
         try:
@@ -416,15 +628,11 @@ class Client:
         except AttributeError:
             pass
 
+        self._stop_writer()
         self._reset_state()
 
     def handle_message(self, message: Message) -> None:
-        handler_map = {
-            Request: self._handle_request,
-            Response: self._handle_response,
-            Notification: self._handle_notification,
-        }
-        handler_map[type(message)](message)
+        self._message_handler_map[type(message)](message)
 
     def _handle_request(self, message: Request) -> None:
         result = None
@@ -455,13 +663,17 @@ class Client:
         except Exception as err:
             LOGGER.exception(err, exc_info=True)
 
-    def send_request(self, method: MethodName, params: dict) -> None:
+    def send_request(self, method: MethodName, params: dict) -> int:
+        """send request, return the request id"""
         # cancel previous request with same method
-        if prev_request := self._request_manager.cancel(method):
+        req_id, prev_request = self._request_manager.replace(method)
+        if prev_request:
             self.send_notification("$/cancelRequest", {"id": prev_request})
 
-        req_id = self._request_manager.add(method)
-        self.send_message(Request(req_id, method, params))
+        self._send_payload(
+            {"jsonrpc": "2.0", "id": req_id, "method": method, "params": params}
+        )
+        return req_id
 
     def send_notification(self, method: MethodName, params: dict) -> None:
         if method in {
@@ -470,9 +682,14 @@ class Client:
         }:
             # cancel all current request
             self._request_manager.cancel_all()
-        self.send_message(Notification(method, params))
+        self._send_payload({"jsonrpc": "2.0", "method": method, "params": params})
 
     def send_response(
         self, id: int, result: Optional[dict] = None, error: Optional[dict] = None
     ) -> None:
-        self.send_message(Response(id, result, error))
+        payload = {"jsonrpc": "2.0", "id": id}
+        if error is None:
+            payload["result"] = result
+        else:
+            payload["error"] = error
+        self._send_payload(payload)
@@ -2,18 +2,60 @@
 
 import logging
 import re
-import threading
-from typing import List, Optional
+from bisect import bisect_left
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, Optional, Tuple
 
 import sublime
 from sublime import HoverZone
 
-from .document import TextChange, is_valid_document
+from .document import RowColIndex, TextChange, is_valid_document
 from .session import Session
 from .constant import LOGGING_CHANNEL
 from .sublime_settings import Settings
 
 LOGGER = logging.getLogger(LOGGING_CHANNEL)
+# Module not reimported on plugin reload, executor recreated after shutdown.
+_HOVER_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def get_hover_executor() -> ThreadPoolExecutor:
+    """get hover executor, create new one if not available"""
+    global _HOVER_EXECUTOR
+    if not _HOVER_EXECUTOR:
+        _HOVER_EXECUTOR = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="CppTools-hover"
+        )
+    return _HOVER_EXECUTOR
+
+
+def shutdown_hover_executor() -> None:
+    """release idle hover worker threads"""
+    global _HOVER_EXECUTOR
+    if _HOVER_EXECUTOR:
+        _HOVER_EXECUTOR.shutdown(wait=False)
+        _HOVER_EXECUTOR = None
+
+
+def log_task_exception(future: Future) -> None:
+    """log exception raised in executor task"""
+    if future.cancelled():
+        return
+    if err := future.exception():
+        LOGGER.error("task error: %s", err, exc_info=err)
+
+
+@lru_cache(maxsize=1)
+def get_cancel_completion_pattern() -> "re.Pattern":
+    """compiled 'cancel_completion_pattern'
+
+    cache cleared by settings 'on_change' registered in 'plugin_loaded()'
+    """
+    with Settings() as settings:
+        pattern = settings.get("cancel_completion_pattern") or "$"
+    return re.compile(pattern)
 
 
 def initialize_server(session: Session, view: sublime.View):
@@ -25,6 +67,7 @@ def initialize_server(session: Session, view: sublime.View):
 class OpenEventListener:
 
     def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.session: Session
         self.prev_completion_point = 0
 
@@ -44,7 +87,7 @@ class OpenEventListener:
         initialize_server(self.session, view)
         self.session.textdocument_didopen(view)
 
-    def _on_load(self, view: sublime.View):
+    def _on_load_async(self, view: sublime.View):
         # check point in valid source
         if not is_valid_document(view):
             return
@@ -52,7 +95,7 @@ class OpenEventListener:
         if self.session.is_ready():
             self.session.textdocument_didopen(view, reload=True)
 
-    def _on_reload(self, view: sublime.View):
+    def _on_reload_async(self, view: sublime.View):
         # check point in valid source
         if not is_valid_document(view):
             return
@@ -60,7 +103,7 @@ class OpenEventListener:
         if self.session.is_ready():
             self.session.textdocument_didopen(view, reload=True)
 
-    def _on_revert(self, view: sublime.View):
+    def _on_revert_async(self, view: sublime.View):
         # check point in valid source
         if not is_valid_document(view):
             return
@@ -72,6 +115,7 @@ class OpenEventListener:
 class SaveEventListener:
 
     def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.session: Session
         self.prev_completion_point = 0
 
@@ -87,6 +131,7 @@ class SaveEventListener:
 class CloseEventListener:
 
     def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.session: Session
         self.prev_completion_point = 0
 
@@ -114,26 +159,24 @@ class TextChangeListener:
 
         if self.session.is_ready():
             self.session.textdocument_didchange(
-                view, [self.to_text_change(c) for c in changes]
+                view, (self.to_text_change(c) for c in changes)
             )
 
     @staticmethod
     def to_text_change(change: sublime.TextChange) -> TextChange:
         """"""
-        start = (change.a.row, change.a.col)
-        end = (change.b.row, change.b.col)
+        start = RowColIndex(change.a.row, change.a.col_utf8)
+        end = RowColIndex(change.b.row, change.b.col_utf8)
         return TextChange(start, end, change.str, change.len_utf8)
 
 
 class CompletionEventListener:
 
     def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.session: Session
 
         self.prev_completion_point = 0
-        with Settings() as settings:
-            pattern = settings.get("cancel_completion_pattern") or "$"
-        self.cancel_completion_pattern = re.compile(pattern)
 
     def _is_context_changed(self, view: sublime.View, point: int) -> bool:
         """"""
@@ -161,7 +204,7 @@ class CompletionEventListener:
 
         if (
             word_str := view.substr(view.word(point))
-        ) and self.cancel_completion_pattern.match(word_str):
+        ) and get_cancel_completion_pattern().match(word_str):
             view.run_command("hide_auto_complete")
             return None
 
@@ -178,32 +221,45 @@ class CompletionEventListener:
 
         self.prev_completion_point = point
 
-        row, col = view.rowcol(point)
+        row, col = view.rowcol_utf8(point)
         self.session.textdocument_completion(view, row, col)
         view.run_command("hide_auto_complete")
-
-        # Use timeout because of slowdown in completion request
-        sublime.set_timeout_async(self.show_signature_help(view, point), 0.5)
         return None
 
-    def show_signature_help(self, view: sublime.View, point: int):
-        # not implemented
-        ...
-
 
 class HoverEventListener:
 
     def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.session: Session
         self.prev_completion_point = 0
+        self._pending_hover: Optional[Future] = None
+        self._hover_sequence = 0
+
+    HOVER_DELAY = 100
+    """delay in milliseconds before hover submitted, skipped if mouse moved"""
 
     def _on_hover(self, view: sublime.View, point: int, hover_zone: HoverZone):
         # check point in valid source
         if not (is_valid_document(view) and hover_zone == sublime.HOVER_TEXT):
             return
 
-        row, col = view.rowcol(point)
-        threading.Thread(target=self._on_hover_task, args=(view, row, col)).start()
+        row, col = view.rowcol_utf8(point)
+        self._hover_sequence += 1
+        sequence = self._hover_sequence
+        sublime.set_timeout(
+            lambda: self._submit_hover(sequence, view, row, col), self.HOVER_DELAY
+        )
+
+    def _submit_hover(self, sequence: int, view: sublime.View, row: int, col: int):
+        if sequence != self._hover_sequence:
+            return
+
+        if self._pending_hover:
+            self._pending_hover.cancel()
+        executor = get_hover_executor()
+        self._pending_hover = executor.submit(self._on_hover_task, view, row, col)
+        self._pending_hover.add_done_callback(log_task_exception)
 
     def _on_hover_task(self, view: sublime.View, row: int, col: int):
         if not self.session.is_ready():
@@ -245,7 +301,7 @@ class GotoDeclarationCommand:
         cursor = self.view.sel()[0]
         point = event["text_point"] if event else cursor.a
         if self.session.is_ready():
-            start_row, start_col = self.view.rowcol(point)
+            start_row, start_col = self.view.rowcol_utf8(point)
             self.session.textdocument_declaration(self.view, start_row, start_col)
 
 
@@ -259,7 +315,7 @@ class GotoDefinitionCommand:
         cursor = self.view.sel()[0]
         point = event["text_point"] if event else cursor.a
         if self.session.is_ready():
-            start_row, start_col = self.view.rowcol(point)
+            start_row, start_col = self.view.rowcol_utf8(point)
             self.session.textdocument_definition(self.view, start_row, start_col)
 
 
@@ -277,7 +333,7 @@ class PrepareRenameCommand:
             self.view.sel().clear()
             self.view.sel().add(point)
 
-            start_row, start_col = self.view.rowcol(point)
+            start_row, start_col = self.view.rowcol_utf8(point)
             self.session.textdocument_preparerename(self.view, start_row, start_col)
 
 
@@ -307,8 +363,8 @@ class CodeActionCommand:
                 self.view.sel().add(point)
 
             selection = self.view.sel()[0]
-            start = self.view.rowcol(selection.begin())
-            end = self.view.rowcol(selection.end())
+            start = self.view.rowcol_utf8(selection.begin())
+            end = self.view.rowcol_utf8(selection.end())
             self.session.textdocument_code_action(self.view, start, end)
 
 
@@ -341,17 +397,49 @@ class ApplyTextChangesCommand:
         self.relocate_selection(active_selection, text_changes)
 
     def apply(self, edit: sublime.Edit, text_changes: List[_BufferedTextChange]):
+        if not text_changes:
+            return
+
+        changes = sorted(text_changes, key=lambda c: c.region.begin())
+        if all(
+            prev.region.end() <= cur.region.begin()
+            for prev, cur in zip(changes, changes[1:])
+        ):
+            # replace from the last change, earlier regions not moved
+            for region, new_text in reversed(self._merge_contiguous(changes)):
+                self.view.replace(edit, region, new_text)
+            return
+
+        # overlapped changes, apply one by one
         move = 0
         for change in text_changes:
             replaced_region = change.get_moved_region(move)
             self.view.replace(edit, replaced_region, change.new_text)
             move += change.offset_move()
 
+    @staticmethod
+    def _merge_contiguous(
+        changes: List[_BufferedTextChange],
+    ) -> List[Tuple[sublime.Region, str]]:
+        """merge sorted changes which end at start of next change"""
+        merged = []
+        start, end, texts = None, None, []
+        for change in changes:
+            if change.region.begin() != end:
+                if texts:
+                    merged.append((sublime.Region(start, end), "".join(texts)))
+                start, texts = change.region.begin(), []
+            texts.append(change.new_text)
+            end = change.region.end()
+
+        merged.append((sublime.Region(start, end), "".join(texts)))
+        return merged
+
     def to_text_change(self, change: dict) -> _BufferedTextChange:
         change = TextChange(**change)
 
-        start = self.view.text_point(*change.start)
-        end = self.view.text_point(*change.end)
+        start = self.view.text_point_utf8(*change.start)
+        end = self.view.text_point_utf8(*change.end)
         region = sublime.Region(start, end)
         old_text = self.view.substr(region)
 
@@ -361,15 +449,17 @@ class ApplyTextChangesCommand:
         self, selections: List[sublime.Region], changes: List[_BufferedTextChange]
     ):
         """relocate current selection following text changes"""
+        changes = sorted(changes, key=lambda c: c.region.begin())
+        starts = [c.region.begin() for c in changes]
+        moves = list(accumulate(c.offset_move() for c in changes))
+
         moved_selections = []
         for selection in selections:
-            temp_selection = selection
-            for change in changes:
-                if temp_selection.begin() > change.region.begin():
-                    temp_selection.a += change.offset_move()
-                    temp_selection.b += change.offset_move()
+            if index := bisect_left(starts, selection.begin()):
+                move = moves[index - 1]
+                selection = sublime.Region(selection.a + move, selection.b + move)
 
-            moved_selections.append(temp_selection)
+            moved_selections.append(selection)
 
         # we must clear current selection
         self.view.sel().clear()
@@ -1,9 +1,9 @@
 """session"""
 
 import threading
-from collections import defaultdict, namedtuple
+from collections import namedtuple
 from dataclasses import asdict
-from typing import Optional, List, Dict, Callable, Any, Union
+from typing import Optional, List, Dict, Callable, Any, Iterable, Union
 
 import sublime
 
@@ -21,35 +21,35 @@ HandlerFunction = Callable[[str, dict], Any]
 RowColIndex = namedtuple("RowColIndex", ["row", "column"])
 
 
-COMPLETION_KIND_MAP = defaultdict(
-    lambda _: sublime.KIND_AMBIGUOUS,
-    {
-        1: (sublime.KindId.COLOR_ORANGISH, "t", ""),  # text
-        2: (sublime.KindId.FUNCTION, "", ""),  # method
-        3: (sublime.KindId.FUNCTION, "", ""),  # function
-        4: (sublime.KindId.FUNCTION, "c", ""),  # constructor
-        5: (sublime.KindId.VARIABLE, "", ""),  # field
-        6: (sublime.KindId.VARIABLE, "", ""),  # variable
-        7: (sublime.KindId.TYPE, "", ""),  # class
-        8: (sublime.KindId.TYPE, "", ""),  # interface
-        9: (sublime.KindId.NAMESPACE, "", ""),  # module
-        10: (sublime.KindId.VARIABLE, "", ""),  # property
-        11: (sublime.KindId.TYPE, "", ""),  # unit
-        12: (sublime.KindId.COLOR_ORANGISH, "v", ""),  # value
-        13: (sublime.KindId.TYPE, "", ""),  # enum
-        14: (sublime.KindId.KEYWORD, "", ""),  # keyword
-        15: (sublime.KindId.SNIPPET, "s", ""),  # snippet
-        16: (sublime.KindId.VARIABLE, "v", ""),  # color
-        17: (sublime.KindId.VARIABLE, "p", ""),  # file
-        18: (sublime.KindId.VARIABLE, "p", ""),  # reference
-        19: (sublime.KindId.VARIABLE, "p", ""),  # folder
-        20: (sublime.KindId.VARIABLE, "v", ""),  # enum member
-        21: (sublime.KindId.VARIABLE, "c", ""),  # constant
-        22: (sublime.KindId.TYPE, "", ""),  # struct
-        23: (sublime.KindId.TYPE, "e", ""),  # event
-        24: (sublime.KindId.KEYWORD, "", ""),  # operator
-        25: (sublime.KindId.TYPE, "", ""),  # type parameter
-    },
+COMPLETION_KIND_MAP = {
+    1: (sublime.KindId.COLOR_ORANGISH, "t", ""),  # text
+    2: (sublime.KindId.FUNCTION, "", ""),  # method
+    3: (sublime.KindId.FUNCTION, "", ""),  # function
+    4: (sublime.KindId.FUNCTION, "c", ""),  # constructor
+    5: (sublime.KindId.VARIABLE, "", ""),  # field
+    6: (sublime.KindId.VARIABLE, "", ""),  # variable
+    7: (sublime.KindId.TYPE, "", ""),  # class
+    8: (sublime.KindId.TYPE, "", ""),  # interface
+    9: (sublime.KindId.NAMESPACE, "", ""),  # module
+    10: (sublime.KindId.VARIABLE, "", ""),  # property
+    11: (sublime.KindId.TYPE, "", ""),  # unit
+    12: (sublime.KindId.COLOR_ORANGISH, "v", ""),  # value
+    13: (sublime.KindId.TYPE, "", ""),  # enum
+    14: (sublime.KindId.KEYWORD, "", ""),  # keyword
+    15: (sublime.KindId.SNIPPET, "s", ""),  # snippet
+    16: (sublime.KindId.VARIABLE, "v", ""),  # color
+    17: (sublime.KindId.VARIABLE, "p", ""),  # file
+    18: (sublime.KindId.VARIABLE, "p", ""),  # reference
+    19: (sublime.KindId.VARIABLE, "p", ""),  # folder
+    20: (sublime.KindId.VARIABLE, "v", ""),  # enum member
+    21: (sublime.KindId.VARIABLE, "c", ""),  # constant
+    22: (sublime.KindId.TYPE, "", ""),  # struct
+    23: (sublime.KindId.TYPE, "e", ""),  # event
+    24: (sublime.KindId.KEYWORD, "", ""),  # operator
+    25: (sublime.KindId.TYPE, "", ""),  # type parameter
+}
+COMPLETION_KIND_TABLE = tuple(
+    COMPLETION_KIND_MAP.get(kind, sublime.KIND_AMBIGUOUS) for kind in range(26)
 )
 
 
@@ -105,10 +105,9 @@ class Session(Handler):
 
     def handle(self, method: MethodName, params: Params) -> Optional[Any]:
         """"""
-        try:
-            func = self.handler_map[method]
-        except (KeyError, AttributeError) as err:
-            raise MethodNotFound(err)
+        func = self.handler_map.get(method)
+        if func is None:
+            raise MethodNotFound(method)
 
         return func(params)
 
@@ -116,11 +115,14 @@ class Session(Handler):
         self.handler_map[method] = function
 
     def run_server(self, env: Optional[dict] = None) -> None:
-        # only one thread can run server
-        if self.run_server_lock.locked():
+        if self.client.is_server_running():
+            return
+
+        # only one thread can run server, others return immediately
+        if not self.run_server_lock.acquire(blocking=False):
             return
 
-        with self.run_server_lock:
+        try:
             if not self.client.is_server_running():
                 sublime.status_message("running language server...")
                 # sometimes the server stop working
@@ -129,6 +131,8 @@ class Session(Handler):
 
                 self.client.run_server(env)
                 self.client.listen()
+        finally:
+            self.run_server_lock.release()
 
     def is_ready(self) -> bool:
         """"""
@@ -145,7 +149,7 @@ class Session(Handler):
     def textdocument_didsave(self, view: sublime.View) -> None: ...
     def textdocument_didclose(self, view: sublime.View) -> None: ...
     def textdocument_didchange(
-        self, view: sublime.View, changes: List[TextChange]
+        self, view: sublime.View, changes: Iterable[TextChange]
     ) -> None: ...
     def textdocument_hover(self, view: sublime.View, row: int, col: int) -> None: ...
     def textdocument_completion(
@@ -21,11 +21,14 @@ class Workspace:
         # and some times the 'View' is invalid.
         self.documents: Dict[sublime.View, BufferedDocument] = {}
         self._lock = threading.Lock()
+        # last document found by get_document_by_name(), called on every change
+        self._last_named_document: Optional[BufferedDocument] = None
 
     def reset(self):
         """"""
         with self._lock:
             self.documents.clear()
+            self._last_named_document = None
 
     def get_document(
         self, view: sublime.View, /, default: Any = None
@@ -33,17 +36,27 @@ class Workspace:
         with self._lock:
             return self.documents.get(view, default)
 
-    def add_document(self, document: BufferedDocument):
+    def add_document(self, document: BufferedDocument) -> int:
+        """add document, return number of documents with same file name"""
         with self._lock:
             self.documents[document.view] = document
+            self._last_named_document = None
+
+            file_name = document.file_name
+            return len(
+                [doc for doc in self.documents.values() if doc.file_name == file_name]
+            )
 
     def remove_document(self, view: sublime.View):
         with self._lock:
             try:
-                del self.documents[view]
+                document = self.documents.pop(view)
             except KeyError as err:
                 LOGGER.debug("document not found %s", err)
-                pass
+                return
+
+            if document is self._last_named_document:
+                self._last_named_document = None
 
     def get_document_by_name(
         self, file_name: PathStr, /, default: Any = None
@@ -51,8 +64,14 @@ class Workspace:
         """get document by name"""
 
         with self._lock:
+            if (
+                document := self._last_named_document
+            ) and document.view.file_name() == file_name:
+                return document
+
             for view, document in self.documents.items():
                 if view.file_name() == file_name:
+                    self._last_named_document = document
                     return document
             return default
 
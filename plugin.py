@@ -23,6 +23,8 @@ from .internal.plugin_implementation import (
     PrepareRenameCommand,
     RenameCommand,
     CodeActionCommand,
+    shutdown_hover_executor,
+    get_cancel_completion_pattern,
 )
 from .internal.session import Session
 from .internal.clangd_implementation import get_session
@@ -34,9 +36,20 @@ LOGGER = logging.getLogger(LOGGING_CHANNEL)
 SESSION: Session = get_session()
 
 
+class SessionHolder:
+    """share 'SESSION' as class attribute, no '__init__' per instance"""
+
+    session: Session = SESSION
+
+
 def setup_logger(level: int):
     """"""
     LOGGER.setLevel(level)
+    # plugin may be reloaded, remove handler added by previous load
+    for handler in list(LOGGER.handlers):
+        LOGGER.removeHandler(handler)
+    LOGGER.propagate = False
+
     fmt = logging.Formatter("%(levelname)s %(filename)s:%(lineno)d  %(message)s")
 
     sh = logging.StreamHandler()
@@ -44,108 +57,96 @@ def setup_logger(level: int):
     LOGGER.addHandler(sh)
 
 
+LOGGING_LEVEL_MAP = {
+    "error": logging.ERROR,
+    "warning": logging.WARNING,
+    "info": logging.INFO,
+    "verbose": logging.DEBUG,
+}
+
+
 def get_logging_settings():
     """get logging level defined in '*.sublime-settings'"""
-    level_map = {
-        "error": logging.ERROR,
-        "warning": logging.WARNING,
-        "info": logging.INFO,
-        "verbose": logging.DEBUG,
-    }
     with Settings() as settings:
-        settings_level = settings.get("logging")
-        return level_map.get(settings_level, logging.ERROR)
+        return LOGGING_LEVEL_MAP.get(settings.get("logging"), logging.ERROR)
+
+
+def update_logging_level():
+    """apply logging level after settings changed"""
+    LOGGER.setLevel(get_logging_settings())
 
 
 def plugin_loaded():
     """plugin entry point"""
     setup_logger(get_logging_settings())
+    # module not reimported on reload, pattern may be changed while unloaded
+    get_cancel_completion_pattern.cache_clear()
+    with Settings() as settings:
+        settings.add_on_change("logging", update_logging_level)
+        settings.add_on_change(
+            "cancel_completion_pattern", get_cancel_completion_pattern.cache_clear
+        )
 
 
 def plugin_unloaded():
     """executed before plugin unloaded"""
+    with Settings() as settings:
+        settings.clear_on_change("logging")
+        settings.clear_on_change("cancel_completion_pattern")
+
     if SESSION:
         SESSION.terminate()
 
+    shutdown_hover_executor()
 
-class CppToolsOpenEventListener(sublime_plugin.EventListener, OpenEventListener):
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
+class CppToolsEventListener(
+    sublime_plugin.EventListener,
+    OpenEventListener,
+    SaveEventListener,
+    CloseEventListener,
+    CompletionEventListener,
+    HoverEventListener,
+    SessionHolder,
+):
 
     def on_activated_async(self, view: sublime.View):
         self._on_activated_async(view)
 
-    def on_load(self, view: sublime.View):
-        self._on_load(view)
-
-    def on_reload(self, view: sublime.View):
-        self._on_reload(view)
-
-    def on_revert(self, view: sublime.View):
-        self._on_revert(view)
+    def on_load_async(self, view: sublime.View):
+        self._on_load_async(view)
 
+    def on_reload_async(self, view: sublime.View):
+        self._on_reload_async(view)
 
-class CppToolsSaveEventListener(sublime_plugin.EventListener, SaveEventListener):
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
+    def on_revert_async(self, view: sublime.View):
+        self._on_revert_async(view)
 
     def on_post_save_async(self, view: sublime.View):
         self._on_post_save_async(view)
 
-
-class CppToolsCloseEventListener(sublime_plugin.EventListener, CloseEventListener):
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
-
     def on_close(self, view: sublime.View):
         self._on_close(view)
 
-
-class CppToolsTextChangeListener(sublime_plugin.TextChangeListener, TextChangeListener):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
-
-    def on_text_changed(self, changes: List[sublime.TextChange]):
-        self._on_text_changed(changes)
-
-
-class CppToolsCompletionEventListener(
-    sublime_plugin.EventListener, CompletionEventListener
-):
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
-
     def on_query_completions(
         self, view: sublime.View, prefix: str, locations: List[int]
     ) -> sublime.CompletionList:
         return self._on_query_completions(view, prefix, locations)
 
-
-class CppToolsHoverEventListener(sublime_plugin.EventListener, HoverEventListener):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
-
     def on_hover(self, view: sublime.View, point: int, hover_zone: HoverZone):
         self._on_hover(view, point, hover_zone)
 
 
-class CppToolsDocumentSignatureHelpCommand(
-    sublime_plugin.TextCommand, DocumentSignatureHelpCommand
+class CppToolsTextChangeListener(
+    sublime_plugin.TextChangeListener, TextChangeListener, SessionHolder
 ):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
+    def on_text_changed(self, changes: List[sublime.TextChange]):
+        self._on_text_changed(changes)
+
 
+class CppToolsDocumentSignatureHelpCommand(
+    sublime_plugin.TextCommand, DocumentSignatureHelpCommand, SessionHolder
+):
     def run(self, edit: sublime.Edit, point: int):
         self._run(edit, point)
 
@@ -154,12 +155,8 @@ class CppToolsDocumentSignatureHelpCommand(
 
 
 class CppToolsDocumentFormattingCommand(
-    sublime_plugin.TextCommand, DocumentFormattingCommand
+    sublime_plugin.TextCommand, DocumentFormattingCommand, SessionHolder
 ):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
-
     def run(self, edit: sublime.Edit):
         self._run(edit)
 
@@ -168,12 +165,8 @@ class CppToolsDocumentFormattingCommand(
 
 
 class CppToolsGotoDeclarationCommand(
-    sublime_plugin.TextCommand, GotoDeclarationCommand
+    sublime_plugin.TextCommand, GotoDeclarationCommand, SessionHolder
 ):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
-
     def run(self, edit: sublime.Edit, event: Optional[dict] = None):
         self._run(edit, event)
 
@@ -184,11 +177,9 @@ class CppToolsGotoDeclarationCommand(
         return True
 
 
-class CppToolsGotoDefinitionCommand(sublime_plugin.TextCommand, GotoDefinitionCommand):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
-
+class CppToolsGotoDefinitionCommand(
+    sublime_plugin.TextCommand, GotoDefinitionCommand, SessionHolder
+):
     def run(self, edit: sublime.Edit, event: Optional[dict] = None):
         self._run(edit, event)
 
@@ -199,11 +190,9 @@ class CppToolsGotoDefinitionCommand(sublime_plugin.TextCommand, GotoDefinitionCo
         return True
 
 
-class CppToolsPrepareRenameCommand(sublime_plugin.TextCommand, PrepareRenameCommand):
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
+class CppToolsPrepareRenameCommand(
+    sublime_plugin.TextCommand, PrepareRenameCommand, SessionHolder
+):
 
     def run(self, edit: sublime.Edit, event: Optional[dict] = None):
         self._run(edit, event)
@@ -215,11 +204,7 @@ class CppToolsPrepareRenameCommand(sublime_plugin.TextCommand, PrepareRenameComm
         return True
 
 
-class CppToolsRenameCommand(sublime_plugin.TextCommand, RenameCommand):
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
+class CppToolsRenameCommand(sublime_plugin.TextCommand, RenameCommand, SessionHolder):
 
     def run(self, edit: sublime.Edit, row: int, column: int, new_name: str):
         self._run(edit, row, column, new_name)
@@ -228,11 +213,9 @@ class CppToolsRenameCommand(sublime_plugin.TextCommand, RenameCommand):
         return is_valid_document(self.view)
 
 
-class CppToolsCodeActionCommand(sublime_plugin.TextCommand, CodeActionCommand):
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
+class CppToolsCodeActionCommand(
+    sublime_plugin.TextCommand, CodeActionCommand, SessionHolder
+):
 
     def run(self, edit: sublime.Edit, event: Optional[dict] = None):
         self._run(edit, event)
@@ -253,11 +236,7 @@ class CppToolsApplyTextChangesCommand(
         self._run(edit, changes)
 
 
-class CppToolsTerminateCommand(sublime_plugin.WindowCommand):
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.session = SESSION
+class CppToolsTerminateCommand(sublime_plugin.WindowCommand, SessionHolder):
 
     def run(self):
         if self.session: